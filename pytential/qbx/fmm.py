@@ -37,6 +37,21 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Storing the QBX expansion coefficients in single precision halves the bytes
+# moved by the (bandwidth-bound) expansion translation and evaluation kernels.
+# The kernels keep computing in the precision of their remaining inputs; only
+# the stored coefficients are rounded. Off by default, since it trades
+# accuracy for bandwidth.
+import os
+_QBX_EXPANSIONS_IN_SINGLE_PRECISION = bool(int(os.environ.get(
+        "PYTENTIAL_QBX_EXPANSIONS_IN_SINGLE_PRECISION", "0")))
+
+_SINGLE_PRECISION_DTYPE_MAP = {
+        np.dtype(np.float64): np.dtype(np.float32),
+        np.dtype(np.complex128): np.dtype(np.complex64),
+        }
+
+
 __doc__ = """
 .. autoclass:: QBXSumpyExpansionWranglerCodeContainer
 
@@ -159,17 +174,22 @@ non_qbx_box_target_lists`),
         order = self.qbx_order
         qbx_l_expn = self.code.qbx_local_expansion(order)
 
+        dtype = np.dtype(self.dtype)
+        if _QBX_EXPANSIONS_IN_SINGLE_PRECISION:
+            dtype = _SINGLE_PRECISION_DTYPE_MAP.get(dtype, dtype)
+
         return cl.array.zeros(
                     self.queue,
                     (self.geo_data.ncenters,
                         len(qbx_l_expn)),
-                    dtype=self.dtype)
+                    dtype=dtype)
 
     def reorder_sources(self, source_array):
-        return (source_array
-                .with_queue(self.queue)
-                [self.tree.user_source_ids]
-                .with_queue(None))
+        # cl.array.take with an explicit queue avoids the
+        # .with_queue(queue)/.with_queue(None) wrapper round-trip.
+        return cl.array.take(
+                source_array, self.tree.user_source_ids,
+                queue=self.queue).with_queue(None)
 
     def reorder_potentials(self, potentials):
         raise NotImplementedError("reorder_potentials should not "
@@ -304,6 +324,10 @@ non_qbx_box_target_lists`),
         wait_for = local_exps.events
 
         for isrc_level in range(geo_data.tree().nlevels):
+            centers_on_level = geo_data.qbx_centers_on_level(isrc_level)
+            if len(centers_on_level) == 0:
+                continue
+
             l2qbxl = self.code.l2qbxl(
                     self.level_orders[isrc_level],
                     self.qbx_order)
@@ -313,6 +337,7 @@ non_qbx_box_target_lists`),
 
             evt, (qbx_expansions_res,) = l2qbxl(
                     self.queue,
+                    qbx_centers_on_level=centers_on_level,
                     qbx_center_to_target_box=geo_data.qbx_center_to_target_box(),
                     target_boxes=trav.target_boxes,
                     target_base_ibox=target_level_start_ibox,
@@ -334,7 +359,8 @@ non_qbx_box_target_lists`),
             wait_for = [evt]
             assert qbx_expansions_res is qbx_expansions
 
-        qbx_expansions.add_event(evt)
+        if events:
+            qbx_expansions.add_event(events[-1])
 
         return (qbx_expansions, SumpyTimingFuture(self.queue, events))
 
@@ -543,14 +569,17 @@ def drive_fmm(expansion_wrangler, src_weight_vecs, timing_data=None,
 
     recorder.add("translate_box_multipoles_to_qbx_local", timing_future)
 
-    qbx_expansions = qbx_expansions + local_result
+    # Accumulate in place: each contribution was freshly allocated by the
+    # wrangler, and a new temporary per stage would cost an extra full pass
+    # over the expansion data.
+    qbx_expansions += local_result
 
     local_result, timing_future = (
             wrangler.translate_box_local_to_qbx_local(local_exps))
 
     recorder.add("translate_box_local_to_qbx_local", timing_future)
 
-    qbx_expansions = qbx_expansions + local_result
+    qbx_expansions += local_result
 
     qbx_potentials, timing_future = wrangler.eval_qbx_expansions(qbx_expansions)
 
@@ -361,6 +361,7 @@ class QBXFMMGeometryData(FMMLibRotationDataInterface):
     .. automethod:: tree()
     .. automethod:: traversal()
     .. automethod:: qbx_center_to_target_box()
+    .. automethod:: qbx_centers_on_level()
     .. automethod:: global_qbx_flags()
     .. automethod:: global_qbx_centers()
     .. automethod:: user_target_to_center()
@@ -698,6 +699,31 @@ class QBXFMMGeometryData(FMMLibRotationDataInterface):
 
             return qbx_center_to_target_box_source_level.with_queue(None)
 
+    @memoize_method
+    def qbx_centers_on_level(self, level):
+        """Return a list of indices of QBX centers whose containing target
+        box is on tree level *level*. Used to restrict per-level translations
+        (such as :class:`pytential.qbx.interactions.L2QBXL`) to the centers
+        they can actually affect, instead of predicating away the rest at
+        run time.
+
+        |cached|
+        """
+        tree = self.tree()
+        trav = self.traversal()
+
+        with cl.CommandQueue(self.cl_context) as queue:
+            qbx_center_to_target_box = \
+                    self.qbx_center_to_target_box().get(queue=queue)
+            target_boxes = trav.target_boxes.get(queue=queue)
+            box_levels = tree.box_levels.get(queue=queue)
+
+            center_levels = box_levels[target_boxes[qbx_center_to_target_box]]
+            centers_on_level = np.nonzero(center_levels == level)[0] \
+                    .astype(tree.particle_id_dtype)
+
+            return cl.array.to_device(queue, centers_on_level).with_queue(None)
+
     @memoize_method
     def global_qbx_flags(self):
         """Return an array of :class:`numpy.int8` of length
@@ -760,7 +786,20 @@ class QBXFMMGeometryData(FMMLibRotationDataInterface):
                 logger.debug("find global qbx centers: using %d/%d centers",
                         int(count.get()), self.ncenters)
 
-            return result[:count.get()].with_queue(None)
+            # Order the centers by their containing target box, so that
+            # adjacent work items in the interaction kernels that iterate
+            # over this list (P2QBXLFromCSR in particular) tend to share a
+            # source box list and their index loads coalesce. The kernels
+            # address all per-center data through this list, so no inverse
+            # permutation is needed.
+            result_host = result[:count.get()].get(queue=queue)
+            center_to_tgt_box = (
+                    self.qbx_center_to_target_box().get(queue=queue))
+            order = np.argsort(
+                    center_to_tgt_box[result_host], kind="stable")
+
+            return cl.array.to_device(
+                    queue, result_host[order]).with_queue(None)
 
     @memoize_method
     def user_target_to_center(self):
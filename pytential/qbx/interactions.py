@@ -40,6 +40,7 @@ class P2QBXLFromCSR(P2EBase):
     def get_cache_key(self):
         return super().get_cache_key() + (PYTENTIAL_KERNEL_VERSION,)
 
+    @memoize_method
     def get_kernel(self):
         ncoeffs = len(self.expansion)
 
@@ -47,8 +48,8 @@ class P2QBXLFromCSR(P2EBase):
         arguments = (
                 [
                     lp.GlobalArg("sources", None, shape=(self.dim, "nsources"),
-                        dim_tags="sep,c"),
-                    lp.GlobalArg("strengths", None, dim_tags="sep,c",
+                        dim_tags="sep,C"),
+                    lp.GlobalArg("strengths", None, dim_tags="sep,C",
                         shape="strength_count, nsources"),
                     lp.GlobalArg("qbx_center_to_target_box",
                         None, shape=None),
@@ -57,7 +58,7 @@ class P2QBXLFromCSR(P2EBase):
                     lp.GlobalArg("box_source_starts,box_source_counts_nonchild",
                         None, shape=None),
                     lp.GlobalArg("qbx_centers", None, shape="dim, ncenters",
-                        dim_tags="sep,c"),
+                        dim_tags="sep,C"),
                     lp.GlobalArg("qbx_expansion_radii", None, shape="ncenters"),
                     lp.GlobalArg("qbx_expansions", None,
                         shape=("ncenters", ncoeffs)),
@@ -93,14 +94,16 @@ class P2QBXLFromCSR(P2EBase):
                         for isrc
                             <> a[idim] = center[idim] - sources[idim, isrc] \
                                     {dup=idim}
-                            """] + self.get_loopy_instructions() + ["""
+                            """] + self.get_loopy_instructions() + [f"""
+                            <> scaled_coeff{i} = {self.get_result_expr(i)}
+                            """ for i in range(ncoeffs)] + ["""
                         end
                     end
 
                     """] + [f"""
                     qbx_expansions[tgt_icenter, {i}] = \
                             simul_reduce(sum, (isrc_box, isrc), \
-                                         {self.get_result_expr(i)}) \
+                                         scaled_coeff{i}) \
                             {{id_prefix=write_expn}}
                     """ for i in range(ncoeffs)] + ["""
 
@@ -120,12 +123,29 @@ class P2QBXLFromCSR(P2EBase):
 
     @memoize_method
     def get_optimized_kernel(self):
-        # FIXME
         knl = self.get_kernel()
-        knl = lp.split_iname(knl, "itgt_center", 16, outer_tag="g.0")
+        knl = lp.split_iname(knl, "itgt_center", 16,
+                outer_tag="g.0", inner_tag="l.0")
+
+        # Factor the per-source part of the collapsed (isrc_box, isrc)
+        # reduction into an inner reduction, so each source box's
+        # contribution is summed into a partial accumulator before being
+        # added to the running per-coefficient total.
+        knl = lp.split_reduction_inward(knl, "isrc")
+
         return knl
 
     def __call__(self, queue, **kwargs):
+        if __debug__:
+            # The kernel declares the point axis of these unit-stride
+            # ("sep,C"); catch inputs in an interleaved layout early.
+            for name in ["sources", "qbx_centers"]:
+                ary = kwargs.get(name)
+                if ary is not None:
+                    assert all(
+                            axis.strides[-1] == axis.dtype.itemsize
+                            for axis in ary)
+
         return self.get_cached_optimized_kernel()(queue, **kwargs)
 
 # }}}
@@ -143,6 +163,7 @@ class M2QBXL(E2EBase):
     def get_cache_key(self):
         return super().get_cache_key() + (PYTENTIAL_KERNEL_VERSION,)
 
+    @memoize_method
     def get_kernel(self):
         ncoeff_src = len(self.src_expansion)
         ncoeff_tgt = len(self.tgt_expansion)
@@ -200,7 +221,7 @@ class M2QBXL(E2EBase):
                     lp.GlobalArg("src_box_starts, src_box_lists",
                         None, shape=None, strides=(1,)),
                     lp.GlobalArg("qbx_centers", None, shape="dim, ncenters",
-                        dim_tags="sep,c"),
+                        dim_tags="sep,C"),
                     lp.GlobalArg("qbx_expansion_radii", None, shape="ncenters"),
                     lp.ValueArg("aligned_nboxes,nsrc_level_boxes", np.int32),
                     lp.ValueArg("src_base_ibox", np.int32),
@@ -224,9 +245,9 @@ class M2QBXL(E2EBase):
 
     @memoize_method
     def get_optimized_kernel(self):
-        # FIXME
         knl = self.get_kernel()
-        knl = lp.split_iname(knl, "icenter", 16, outer_tag="g.0")
+        knl = lp.split_iname(knl, "icenter", 16,
+                outer_tag="g.0", inner_tag="l.0")
         return knl
 
     def __call__(self, queue, **kwargs):
@@ -251,6 +272,7 @@ class L2QBXL(E2EBase):
     def get_cache_key(self):
         return super().get_cache_key() + (PYTENTIAL_KERNEL_VERSION,)
 
+    @memoize_method
     def get_kernel(self):
         ncoeff_src = len(self.src_expansion)
         ncoeff_tgt = len(self.tgt_expansion)
@@ -258,11 +280,17 @@ class L2QBXL(E2EBase):
         from sumpy.tools import gather_loopy_arguments
         loopy_knl = lp.make_kernel(
                 [
-                    "{[icenter]: 0<=icenter<ncenters}",
+                    "{[icenter_on_level]: 0<=icenter_on_level<ncenters_on_level}",
                     "{[idim]: 0<=idim<dim}",
                     ],
                 ["""
-                for icenter
+                for icenter_on_level
+                    # *qbx_centers_on_level* only contains centers whose
+                    # containing target box is on the level currently under
+                    # consideration, so no in-range check on the box number
+                    # is needed here.
+                    <> icenter = qbx_centers_on_level[icenter_on_level]
+
                     <> isrc_box = qbx_center_to_target_box[icenter]
 
                     # The box's expansions which we're translating here
@@ -271,40 +299,35 @@ class L2QBXL(E2EBase):
                     <> src_ibox = target_boxes[isrc_box] \
                         {id=read_src_ibox}
 
-                    # Is the box number on the level currently under
-                    # consideration?
-                    <> in_range = (target_base_ibox <= src_ibox
-                            and src_ibox < target_base_ibox + nboxes)
-
-                    if in_range
-                        <> tgt_center[idim] = qbx_centers[idim, icenter]
-                        <> src_center[idim] = centers[idim, src_ibox] {dup=idim}
+                    <> tgt_center[idim] = qbx_centers[idim, icenter]
+                    <> src_center[idim] = centers[idim, src_ibox] {dup=idim}
 
-                        <> tgt_rscale = qbx_expansion_radii[icenter]
+                    <> tgt_rscale = qbx_expansion_radii[icenter]
 
-                        <> d[idim] = tgt_center[idim] - src_center[idim] {dup=idim}
+                    <> d[idim] = tgt_center[idim] - src_center[idim] {dup=idim}
 
-                        """] + ["""
-                        <> src_coeff{i} = \
-                                expansions[src_ibox - target_base_ibox, {i}] \
-                                {{dep=read_src_ibox}}
-                        """.format(i=i) for i in range(ncoeff_src)] + [
-                        ] + self.get_translation_loopy_insns() + ["""
-                        qbx_expansions[icenter, {i}] = \
-                            qbx_expansions[icenter, {i}] + coeff{i} \
-                            {{id_prefix=write_expn}}
-                        """.format(i=i)
-                            for i in range(ncoeff_tgt)] + ["""
-                    end
+                    """] + ["""
+                    <> src_coeff{i} = \
+                            expansions[src_ibox - target_base_ibox, {i}] \
+                            {{dep=read_src_ibox}}
+                    """.format(i=i) for i in range(ncoeff_src)] + [
+                    ] + self.get_translation_loopy_insns() + ["""
+                    qbx_expansions[icenter, {i}] = \
+                        qbx_expansions[icenter, {i}] + coeff{i} \
+                        {{id_prefix=write_expn}}
+                    """.format(i=i)
+                        for i in range(ncoeff_tgt)] + ["""
                 end
                 """],
                 [
+                    lp.GlobalArg("qbx_centers_on_level", None,
+                        shape="ncenters_on_level"),
                     lp.GlobalArg("target_boxes", None, shape=None,
                         offset=lp.auto),
                     lp.GlobalArg("centers", None, shape="dim, naligned_boxes"),
                     lp.ValueArg("src_rscale", None),
                     lp.GlobalArg("qbx_centers", None, shape="dim, ncenters",
-                        dim_tags="sep,c"),
+                        dim_tags="sep,C"),
                     lp.GlobalArg("qbx_expansion_radii", None, shape="ncenters"),
                     lp.ValueArg("naligned_boxes,target_base_ibox,nboxes", np.int32),
                     lp.GlobalArg("expansions", None,
@@ -312,7 +335,7 @@ class L2QBXL(E2EBase):
                     "..."
                 ] + gather_loopy_arguments([self.src_expansion, self.tgt_expansion]),
                 name=self.name,
-                assumptions="ncenters>=1",
+                assumptions="ncenters_on_level>=1",
                 silenced_warnings="write_race(write_expn*)",
                 fixed_parameters=dict(dim=self.dim, nchildren=2**self.dim),
                 lang_version=MOST_RECENT_LANGUAGE_VERSION)
@@ -326,9 +349,9 @@ class L2QBXL(E2EBase):
 
     @memoize_method
     def get_optimized_kernel(self):
-        # FIXME
         knl = self.get_kernel()
-        knl = lp.split_iname(knl, "icenter", 16, outer_tag="g.0")
+        knl = lp.split_iname(knl, "icenter_on_level", 16,
+                outer_tag="g.0", inner_tag="l.0")
         return knl
 
     def __call__(self, queue, **kwargs):
@@ -353,6 +376,7 @@ class QBXL2P(E2PBase):
     def get_cache_key(self):
         return super().get_cache_key() + (PYTENTIAL_KERNEL_VERSION,)
 
+    @memoize_method
     def get_kernel(self):
         ncoeffs = len(self.expansion)
 
@@ -376,17 +400,17 @@ class QBXL2P(E2PBase):
                     <> center[idim] = qbx_centers[idim, src_icenter] {dup=idim}
                     <> rscale = qbx_expansion_radii[src_icenter]
 
+                    """] + ["""
+                    <> coeff{i} = qbx_expansions[src_icenter, {i}]
+                    """.format(i=i) for i in range(ncoeffs)] + ["""
+
                     for icenter_tgt
 
                         <> center_itgt = center_to_targets_lists[icenter_tgt]
 
                         <> b[idim] = targets[idim, center_itgt] - center[idim]
 
-                        """] + ["""
-                        <> coeff{i} = qbx_expansions[src_icenter, {i}]
-                        """.format(i=i) for i in range(ncoeffs)] + [
-
-                        ] + loopy_insns + ["""
+                        """] + loopy_insns + ["""
 
                         result[{i},center_itgt] = kernel_scaling * result_{i}_p \
                                 {{id_prefix=write_result}}
@@ -399,7 +423,7 @@ class QBXL2P(E2PBase):
                     lp.GlobalArg("result", None, shape="nresults, ntargets",
                         dim_tags="sep,C"),
                     lp.GlobalArg("qbx_centers", None, shape="dim, ncenters",
-                        dim_tags="sep,c"),
+                        dim_tags="sep,C"),
                     lp.GlobalArg("center_to_targets_starts,center_to_targets_lists",
                         None, shape=None),
                     lp.GlobalArg("qbx_expansions", None,
@@ -422,9 +446,9 @@ class QBXL2P(E2PBase):
 
     @memoize_method
     def get_optimized_kernel(self):
-        # FIXME
         knl = self.get_kernel()
-        knl = lp.tag_inames(knl, dict(iglobal_center="g.0"))
+        knl = lp.split_iname(knl, "iglobal_center", 16,
+                outer_tag="g.0", inner_tag="l.0")
         return knl
 
     def __call__(self, queue, **kwargs):
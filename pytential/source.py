@@ -20,10 +20,15 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
 
+from functools import lru_cache, singledispatch
+
 import numpy as np
 import pyopencl as cl
-from pytools import memoize_in
+from meshmode.discretization import Discretization
+from meshmode.dof_array import DOFArray
+from pytools import memoize_in, memoize_method
 from sumpy.fmm import UnableToCollectTimingData
+from sumpy.kernel import AxisTargetDerivativeRemover
 
 
 __doc__ = """
@@ -33,6 +38,25 @@ __doc__ = """
 """
 
 
+# Mappers are stateless; constructing a fresh one for every kernel on the
+# symbolic path just rewarms its caches.
+_ATDR = AxisTargetDerivativeRemover()
+
+
+@lru_cache(maxsize=4096)
+def _strip_target_derivatives(kernel):
+    # Sumpy kernels are immutable and hashable, and the same kernels come
+    # through here repeatedly within (and across) bind() calls, so cache the
+    # tree rewrite instead of re-walking the kernel each time.
+    return _ATDR(kernel)
+
+
+_REAL_TO_COMPLEX_DTYPE = {
+        np.dtype(np.float32): np.dtype(np.complex64),
+        np.dtype(np.float64): np.dtype(np.complex128),
+        }
+
+
 class PotentialSource:
     """
     .. automethod:: preprocess_optemplate
@@ -64,19 +88,21 @@ class PotentialSource:
 class _SumpyP2PMixin:
 
     def get_p2p(self, actx, kernels):
+        # The memoized function below is shared by all sources using *actx*,
+        # so anything the result depends on--in particular the value dtype,
+        # which varies by source--must be part of the key, not closed over.
         @memoize_in(actx, (_SumpyP2PMixin, "p2p"))
-        def p2p(kernels):
-            from pytools import any
-            if any(knl.is_complex_valued for knl in kernels):
-                value_dtype = self.complex_dtype
-            else:
-                value_dtype = self.real_dtype
-
+        def p2p(kernels, value_dtype):
             from sumpy.p2p import P2P
             return P2P(actx.context,
                     kernels, exclude_self=False, value_dtypes=value_dtype)
 
-        return p2p(kernels)
+        if any(knl.is_complex_valued for knl in kernels):
+            value_dtype = self.complex_dtype
+        else:
+            value_dtype = self.real_dtype
+
+        return p2p(kernels, value_dtype)
 
 
 # {{{ point potential source
@@ -94,6 +120,35 @@ class PointPotentialSource(_SumpyP2PMixin, PotentialSource):
     """
 
     def __init__(self, nodes):
+        if isinstance(nodes, np.ndarray) and nodes.dtype.char == "O":
+            # An object array with one allocation per axis makes every p2p
+            # pass read ambient_dim scattered buffers; normalize to a single
+            # contiguous [ambient_dim, ndofs] array up front. (Per-axis views
+            # into the result are just offset views, so nothing is lost.)
+            if all(isinstance(axis, cl.array.Array) for axis in nodes):
+                queue = next(
+                        (axis.queue for axis in nodes
+                            if axis.queue is not None),
+                        None)
+                if queue is None:
+                    # long-lived arrays are typically stored queue-less
+                    queue = cl.CommandQueue(nodes[0].context)
+
+                ndofs, = nodes[0].shape
+                nodes = (
+                        cl.array.concatenate(
+                            [axis.with_queue(queue) for axis in nodes],
+                            queue=queue)
+                        .reshape(len(nodes), ndofs)
+                        .with_queue(None))
+            elif all(isinstance(axis, np.ndarray) for axis in nodes):
+                nodes = np.stack(list(nodes))
+            else:
+                raise TypeError(
+                        "unable to normalize object array of nodes to a "
+                        "two-dimensional array: expected pyopencl or numpy "
+                        "arrays as components")
+
         self._nodes = nodes
 
     @property
@@ -113,25 +168,20 @@ class PointPotentialSource(_SumpyP2PMixin, PotentialSource):
 
     @property
     def ndofs(self):
-        for coord_ary in self._nodes:
-            return coord_ary.shape[0]
+        return self._nodes.shape[-1]
 
     @property
     def complex_dtype(self):
-        return {
-                np.float32: np.complex64,
-                np.float64: np.complex128
-                }[self.real_dtype.type]
+        return _REAL_TO_COMPLEX_DTYPE[self.real_dtype]
 
     @property
     def ambient_dim(self):
         return self._nodes.shape[0]
 
     def op_group_features(self, expr):
-        from sumpy.kernel import AxisTargetDerivativeRemover
         result = (
                 expr.source, expr.density,
-                AxisTargetDerivativeRemover()(expr.kernel),
+                _strip_target_derivatives(expr.kernel),
                 )
 
         return result
@@ -150,35 +200,51 @@ class PointPotentialSource(_SumpyP2PMixin, PotentialSource):
 
         p2p = None
 
-        kernel_args = {}
-        for arg_name, arg_expr in insn.kernel_arguments.items():
-            kernel_args[arg_name] = evaluate(arg_expr)
+        if insn.kernel_arguments:
+            # Evaluate all kernel arguments through a single object array, so
+            # that subexpressions shared between them (normals, Helmholtz k,
+            # ...) are only computed once.
+            from pytools.obj_array import make_obj_array
+            kernel_args = dict(zip(
+                    insn.kernel_arguments.keys(),
+                    evaluate(make_obj_array(
+                        list(insn.kernel_arguments.values())))))
+        else:
+            kernel_args = {}
 
         strengths = evaluate(insn.density)
 
-        # FIXME: Do this all at once
-        results = []
+        # Outputs that share a target discretization differ only in their
+        # kernel index into the same p2p result, so evaluate each distinct
+        # target only once.
+        outputs_by_target_name = {}
         for o in insn.outputs:
+            outputs_by_target_name.setdefault(o.target_name, []).append(o)
+
+        from pytential.utils import flatten_if_needed
+
+        results = []
+        for target_name, outputs in outputs_by_target_name.items():
             target_discr = bound_expr.places.get_discretization(
-                    o.target_name.geometry, o.target_name.discr_stage)
+                    target_name.geometry, target_name.discr_stage)
 
             # no on-disk kernel caching
             if p2p is None:
                 p2p = self.get_p2p(actx, insn.kernels)
 
-            from pytential.utils import flatten_if_needed
             evt, output_for_each_kernel = p2p(actx.queue,
                     flatten_if_needed(actx, target_discr.nodes()),
                     self._nodes,
                     [strengths], **kernel_args)
 
-            from meshmode.discretization import Discretization
-            result = output_for_each_kernel[o.kernel_index]
-            if isinstance(target_discr, Discretization):
-                from meshmode.dof_array import unflatten
-                result = unflatten(actx, target_discr, result)
+            is_discretization = isinstance(target_discr, Discretization)
+            for o in outputs:
+                result = output_for_each_kernel[o.kernel_index]
+                if is_discretization:
+                    from meshmode.dof_array import unflatten
+                    result = unflatten(actx, target_discr, result)
 
-            results.append((o.name, result))
+                results.append((o.name, result))
 
         timing_data = {}
         return results, timing_data
@@ -188,22 +254,39 @@ class PointPotentialSource(_SumpyP2PMixin, PotentialSource):
 
 # {{{ layer potential source
 
+@singledispatch
 def _entry_dtype(ary):
-    from meshmode.dof_array import DOFArray
-    if isinstance(ary, DOFArray):
-        # the "normal case"
-        return ary.entry_dtype
-    elif isinstance(ary, np.ndarray):
-        if ary.dtype.char == "O":
+    raise TypeError(f"unexpected type '{type(ary)}' in _entry_dtype")
+
+
+@_entry_dtype.register(DOFArray)
+def _entry_dtype_dof_array(ary):
+    # the "normal case"
+    return ary.entry_dtype
+
+
+@_entry_dtype.register(np.ndarray)
+def _entry_dtype_ndarray(ary):
+    if ary.dtype.char == "O":
+        # Entries of an object array are homogeneous (enforced where the
+        # arrays are built), so the first one determines the dtype;
+        # checking all of them is debug-mode-only.
+        result = _entry_dtype(ary.flat[0])
+
+        if __debug__:
             from pytools import single_valued
-            return single_valued(_entry_dtype(entry) for entry in ary.flat)
-        else:
-            return ary.dtype
-    elif isinstance(ary, cl.array.Array):
-        # for "unregularized" layer potential sources
-        return ary.dtype
+            assert result == single_valued(
+                    _entry_dtype(entry) for entry in ary.flat)
+
+        return result
     else:
-        raise TypeError(f"unexpected type '{type(ary)}' in _entry_dtype")
+        return ary.dtype
+
+
+@_entry_dtype.register(cl.array.Array)
+def _entry_dtype_cl_array(ary):
+    # for "unregularized" layer potential sources
+    return ary.dtype
 
 
 class LayerPotentialSourceBase(_SumpyP2PMixin, PotentialSource):
@@ -224,44 +307,47 @@ class LayerPotentialSourceBase(_SumpyP2PMixin, PotentialSource):
     def __init__(self, density_discr):
         self.density_discr = density_discr
 
+    # The properties below simply delegate to the density discretization,
+    # but they sit on hot symbolic/setup paths and *density_discr* does not
+    # change over the instance's lifetime, so cache the lookups.
+
     @property
+    @memoize_method
     def ambient_dim(self):
         return self.density_discr.ambient_dim
 
     @property
+    @memoize_method
     def _setup_actx(self):
         return self.density_discr._setup_actx
 
     @property
+    @memoize_method
     def dim(self):
         return self.density_discr.dim
 
     @property
+    @memoize_method
     def cl_context(self):
         return self.density_discr._setup_actx.context
 
     @property
+    @memoize_method
     def real_dtype(self):
         return self.density_discr.real_dtype
 
     @property
+    @memoize_method
     def complex_dtype(self):
         return self.density_discr.complex_dtype
 
     # {{{ fmm setup helpers
 
     def get_fmm_kernel(self, kernels):
-        fmm_kernel = None
-
-        from sumpy.kernel import AxisTargetDerivativeRemover
-        for knl in kernels:
-            candidate_fmm_kernel = AxisTargetDerivativeRemover()(knl)
-
-            if fmm_kernel is None:
-                fmm_kernel = candidate_fmm_kernel
-            else:
-                assert fmm_kernel == candidate_fmm_kernel
+        fmm_kernels = {_strip_target_derivatives(knl) for knl in kernels}
+        assert len(fmm_kernels) == 1
 
+        fmm_kernel, = fmm_kernels
         return fmm_kernel
 
     def get_fmm_output_and_expansion_dtype(self, base_kernel, strengths):
@@ -277,20 +363,10 @@ class LayerPotentialSourceBase(_SumpyP2PMixin, PotentialSource):
 
         queue = actx.queue
 
-        def reorder_sources(source_array):
-            if isinstance(source_array, cl.array.Array):
-                return (source_array
-                        .with_queue(queue)
-                        [tree_user_source_ids]
-                        .with_queue(None))
-            else:
-                return source_array
-
         kernel_extra_kwargs = {}
         source_extra_kwargs = {}
 
         from sumpy.tools import gather_arguments, gather_source_arguments
-        from pytools.obj_array import obj_array_vectorize
         from pytential.utils import flatten_if_needed
 
         for func, var_dict in [
@@ -298,9 +374,43 @@ class LayerPotentialSourceBase(_SumpyP2PMixin, PotentialSource):
                 (gather_source_arguments, source_extra_kwargs),
                 ]:
             for arg in func(out_kernels):
-                var_dict[arg.name] = obj_array_vectorize(
-                        reorder_sources,
-                        flatten_if_needed(actx, evaluator(arguments[arg.name])))
+                var_dict[arg.name] = flatten_if_needed(
+                        actx, evaluator(arguments[arg.name]))
+
+        # {{{ batched source reordering
+
+        # Collect all device arrays gathered above (multi-component arguments
+        # such as normals contribute one entry per component) and reorder all
+        # arrays of a given dtype with a single gather kernel, rather than
+        # enqueuing one gather per component.
+
+        reorder_locations = {}
+        for var_dict in [kernel_extra_kwargs, source_extra_kwargs]:
+            for name, value in var_dict.items():
+                if isinstance(value, cl.array.Array):
+                    reorder_locations.setdefault(value.dtype, []).append(
+                            (var_dict, name, None, value))
+                elif isinstance(value, np.ndarray) and value.dtype.char == "O":
+                    for i, entry in enumerate(value):
+                        if isinstance(entry, cl.array.Array):
+                            reorder_locations.setdefault(
+                                    entry.dtype, []).append(
+                                        (var_dict, name, i, entry))
+
+        for locations in reorder_locations.values():
+            reordered = cl.array.multi_take(
+                    [ary.with_queue(queue) for _, _, _, ary in locations],
+                    tree_user_source_ids,
+                    queue=queue)
+
+            for (var_dict, name, i, _), result in zip(locations, reordered):
+                result = result.with_queue(None)
+                if i is None:
+                    var_dict[name] = result
+                else:
+                    var_dict[name][i] = result
+
+        # }}}
 
         return kernel_extra_kwargs, source_extra_kwargs
 